@@ -2,6 +2,9 @@ import requests
 import re
 import os
 import time
+import json
+import sqlite3
+import hashlib
 
 #修复空文案的命名问题，支持多次重试下载，仍失败则保存失败链接备份
 
@@ -60,6 +63,11 @@ def clean_filename(filename):
         filename = filename[:120]
     return filename.strip().replace("\n", "_")  # 移除换行符
 
+def extract_video_id(douyin_url):
+    # 短链接中的编码作为视频ID，例如 https://v.douyin.com/ej8oSpxgpzc/ -> ej8oSpxgpzc
+    match = re.search(r'https://v\.douyin\.com/([^/]+)/', douyin_url)
+    return match.group(1) if match else None
+
 def download_video(video_url, video_title, download_folder, max_retries=5):
     video_title = clean_filename(video_title)
     
@@ -73,16 +81,28 @@ def download_video(video_url, video_title, download_folder, max_retries=5):
     
     file_path = os.path.join(download_folder, filename)
     
+    # 计时包含建立连接和之前失败的重试
+    start = time.time()
     for attempt in range(max_retries):
         try:
             response = requests.get(video_url, stream=True, timeout=10)
             if response.status_code == 200:
+                # 边下载边统计大小和哈希，不需要重新读取文件
+                size = 0
+                sha256 = hashlib.sha256()
                 with open(file_path, "wb") as f:
                     for chunk in response.iter_content(chunk_size=1024):
                         if chunk:
                             f.write(chunk)
+                            size += len(chunk)
+                            sha256.update(chunk)
                 print(f"Video downloaded successfully as {file_path}")
-                return True
+                return {
+                    "file_path": file_path,
+                    "bytes": size,
+                    "sha256": sha256.hexdigest(),
+                    "download_seconds": round(time.time() - start, 3),
+                }
             else:
                 print(f"Failed to download video. Status code: {response.status_code}")
         except requests.exceptions.RequestException as e:
@@ -97,7 +117,7 @@ def download_video(video_url, video_title, download_folder, max_retries=5):
     if os.path.exists(file_path):
         os.remove(file_path)
         print(f"Deleted failed download after all retries: {file_path}")
-    return False
+    return None
 
 def read_links_from_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
@@ -109,11 +129,85 @@ def write_failed_link_to_file(link, file_path="fail.txt"):
         file.write(link + "\n")
     print(f"Failed link added to {file_path}: {link}")
 
-def save_titles_to_file(titles, file_path="douyin_video_title.txt"):
-    with open(file_path, 'w', encoding='utf-8') as file:
-        for title in titles:
-            file.write(title + "\n")
-    print(f"Video titles saved to {file_path}")
+class VideoManifest:
+    """逐条追加写入的视频元数据清单（SQLite），替代原来的 save_titles_to_file
+
+    每处理一个链接就写入一行并立即提交（每条记录本身就要耗费数秒网络时间，逐条提交的开销可以忽略），
+    程序中途崩溃也不会丢失已处理的记录。
+    内存中不保留已写入的记录，link/title/sha256 上建有索引，百万级记录也能快速查询，
+    查询结果以生成器逐行返回。
+    """
+
+    COLUMNS = ("link", "video_id", "title", "video_url", "file_path", "bytes",
+               "sha256", "status", "parse_seconds", "download_seconds", "created_at")
+
+    def __init__(self, db_path="douyin_manifest.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                link TEXT NOT NULL,
+                video_id TEXT,
+                title TEXT,
+                video_url TEXT,
+                file_path TEXT,
+                bytes INTEGER,
+                sha256 TEXT,
+                status TEXT NOT NULL,
+                parse_seconds REAL,
+                download_seconds REAL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_link ON videos(link)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_title ON videos(title)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_sha256 ON videos(sha256)")
+        self.conn.commit()
+
+    def add(self, link, status, **fields):
+        # 追加一条记录，未提供的字段写入 NULL
+        fields["link"] = link
+        fields["status"] = status
+        fields.setdefault("created_at", time.time())
+        values = [fields.get(column) for column in self.COLUMNS]
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        self.conn.execute(f"INSERT INTO videos ({', '.join(self.COLUMNS)}) VALUES ({placeholders})", values)
+        self.conn.commit()
+
+    def _find(self, column, value):
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM videos WHERE {column} = ? ORDER BY id", (value,))
+        for row in cursor:
+            yield dict(zip(self.COLUMNS, row))
+
+    def find_by_link(self, link):
+        return self._find("link", link)
+
+    def find_by_title(self, title):
+        return self._find("title", title)
+
+    def find_by_hash(self, sha256):
+        return self._find("sha256", sha256)
+
+    def export_jsonl(self, file_path="douyin_manifest.jsonl", status="ok"):
+        # 逐行导出精简的 JSONL，游标按需读取，不会把整张表加载到内存
+        columns = ("link", "video_id", "title", "file_path", "bytes", "sha256")
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM videos WHERE status = ? ORDER BY id", (status,))
+        count = 0
+        with open(file_path, 'w', encoding='utf-8') as file:
+            for row in cursor:
+                record = {key: value for key, value in zip(columns, row) if value is not None}
+                file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                count += 1
+        print(f"Exported {count} manifest entries to {file_path}")
+        return count
+
+    def close(self):
+        self.conn.close()
 
 def main():
     input_file = "douyin_video_01.txt"
@@ -124,27 +218,39 @@ def main():
         print(f"Created download folder: {download_folder}")
     
     links = read_links_from_file(input_file)
-    video_titles = []
-    
-    for link in links:
-        print(f"Processing link: {link}")
-        douyin_url = extract_douyin_link(link)
-        if douyin_url:
-            print(f"Extracted Douyin link: {douyin_url}")
-            video_url, video_title = parse_douyin_video(douyin_url)
-            if video_url and video_title:
-                print(f"无水印视频下载链接: {video_url}")
-                print(f"视频标题: {video_title}")
-                video_titles.append(video_title)
-                if not download_video(video_url, video_title, download_folder):
-                    write_failed_link_to_file(link)
+    manifest = VideoManifest()
+
+    try:
+        for link in links:
+            print(f"Processing link: {link}")
+            douyin_url = extract_douyin_link(link)
+            if douyin_url:
+                print(f"Extracted Douyin link: {douyin_url}")
+                video_id = extract_video_id(douyin_url)
+                parse_start = time.time()
+                video_url, video_title = parse_douyin_video(douyin_url)
+                parse_seconds = round(time.time() - parse_start, 3)
+                if video_url and video_title:
+                    print(f"无水印视频下载链接: {video_url}")
+                    print(f"视频标题: {video_title}")
+                    result = download_video(video_url, video_title, download_folder)
+                    if result:
+                        manifest.add(link, "ok", video_id=video_id, title=video_title, video_url=video_url,
+                                     parse_seconds=parse_seconds, **result)
+                    else:
+                        write_failed_link_to_file(link)
+                        manifest.add(link, "download_failed", video_id=video_id, title=video_title,
+                                     video_url=video_url, parse_seconds=parse_seconds)
+                else:
+                    print("Failed to parse video URL or title")
+                    manifest.add(link, "parse_failed", video_id=video_id, parse_seconds=parse_seconds)
             else:
-                print("Failed to parse video URL or title")
-        else:
-            print("Failed to extract valid Douyin link from input.")
-        print("-" * 50)
-    
-    # save_titles_to_file(video_titles)
+                print("Failed to extract valid Douyin link from input.")
+                manifest.add(link, "invalid_link")
+            print("-" * 50)
+    finally:
+        manifest.close()
+        print(f"Video manifest saved to {manifest.db_path}")
 
 if __name__ == "__main__":
     main()
@@ -2,7 +2,100 @@ import tkinter as tk
 from tkinter import ttk
 import time
 import random
-import winsound  # 添加音效库
+import threading
+from collections import deque
+
+try:
+    import winsound  # 添加音效库（仅 Windows）
+except ImportError:
+    winsound = None
+
+
+class SoundPlayer:
+    """非阻塞音效：Windows 下由后台线程调用 winsound.Beep，其他平台退化为 Tk 的 bell
+
+    按键速度超过音效播放速度时只保留最新的一个待播放音效，不会积压。
+    没有 winsound 时用响铃次数区分音效（bells=1 或 2），由 Tk 定时器在主线程播放。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.pending = None
+        self.condition = threading.Condition()
+        self.bell_job = None  # 已安排但尚未执行的响铃
+        self.bell_free_at = 0  # 上一次响铃结束的时间
+        if winsound is not None:
+            threading.Thread(target=self.worker, daemon=True).start()
+
+    def play(self, frequency, duration, bells=1):
+        if winsound is None:
+            self.pending = (frequency, duration, bells)  # 覆盖尚未播放的旧音效
+            if self.bell_job is None:
+                delay = max(0, int((self.bell_free_at - time.perf_counter()) * 1000))
+                self.bell_job = self.root.after(delay, self.ring)
+            return
+        with self.condition:
+            self.pending = (frequency, duration, bells)  # 覆盖尚未播放的旧音效
+            self.condition.notify()
+
+    def ring(self):
+        self.bell_job = None
+        frequency, duration, bells = self.pending
+        self.pending = None
+        for i in range(bells):
+            self.root.after(i * duration, self.root.bell)
+        self.bell_free_at = time.perf_counter() + bells * duration / 1000
+
+    def worker(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                frequency, duration, bells = self.pending
+                self.pending = None
+            winsound.Beep(frequency, duration)
+
+
+class LatencyProbe:
+    """记录从按键事件发生到界面高亮刷新完成的耗时（含事件在 Tk 队列中等待的时间），用于统计 p50/p99
+
+    event.time 是系统给事件打的毫秒时间戳，与本地时钟只差一个固定偏移；
+    取观察到的最小差值作为偏移，即以排队最短的那次事件为零点对齐。
+    时间戳是 32 位计数器，回绕后偏移会突然变大，超过 rebase_ms 时重新对齐。
+    """
+
+    rebase_ms = 5000
+
+    def __init__(self, root, maxlen=500):
+        self.root = root
+        self.samples = deque(maxlen=maxlen)  # 只保留最近的样本，单位毫秒
+        self.clock_offset = None
+
+    def start(self, event):
+        now = time.perf_counter() * 1000
+        event_time = getattr(event, 'time', None)
+        if not isinstance(event_time, int):
+            return now  # 合成事件没有时间戳，只能从处理开始计时
+        event_time &= 0xFFFFFFFF  # Windows 的 GetMessageTime 超过 2^31 后会以负数出现
+        if event_time == 0:
+            return now
+        offset = now - event_time
+        if (self.clock_offset is None or offset < self.clock_offset
+                or offset - self.clock_offset > self.rebase_ms):
+            self.clock_offset = offset
+        return event_time + self.clock_offset
+
+    def stop(self, started):
+        # after_idle 回调排在本次事件触发的重绘之后执行
+        self.root.after_idle(lambda: self.samples.append(time.perf_counter() * 1000 - started))
+
+    def report(self):
+        if not self.samples:
+            return "延迟 p50: 0.0ms p99: 0.0ms"
+        ordered = sorted(self.samples)
+        p50 = ordered[len(ordered) // 2]
+        p99 = ordered[min(len(ordered) * 99 // 100, len(ordered) - 1)]
+        return f"延迟 p50: {p50:.1f}ms p99: {p99:.1f}ms"
 
 
 class TypingTutor:
@@ -30,13 +123,19 @@ class TypingTutor:
         # 汉字练习
         self.chinese_chars = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进样理体信息东"
 
-        # 初始化音效
-        self.correct_sound = lambda: winsound.Beep(1000, 100)  # 正确音效(高音)
-        self.wrong_sound = lambda: winsound.Beep(400, 100)  # 错误音效(低音)
+        # 初始化音效（后台播放，不阻塞界面）
+        self.sound_player = SoundPlayer(self.root)
+        self.correct_sound = lambda: self.sound_player.play(1000, 100, bells=1)  # 正确音效(高音/响一声)
+        self.wrong_sound = lambda: self.sound_player.play(400, 100, bells=2)  # 错误音效(低音/响两声)
+
+        # 按键延迟统计，百分位由定时器刷新，不在按键处理中计算
+        self.latency_probe = LatencyProbe(self.root)
+        self.latency_text = ""
 
         # 初始化界面
         self.setup_ui()
         self.new_exercise()
+        self.refresh_latency()
 
     def setup_ui(self):
         # 定义字体样式
@@ -73,6 +172,10 @@ class TypingTutor:
         # 用户输入显示（带高亮） - 修改高度为4行
         self.input_text = tk.Text(main_frame, height=4, width=60, wrap=tk.WORD, font=self.normal_font)
         self.input_text.grid(row=2, column=0, pady=5, sticky="nsew")
+        # 标签样式只需配置一次
+        self.input_text.tag_config("correct", background="lightgreen")
+        self.input_text.tag_config("wrong", background="salmon")
+        self.track_edits()
 
         # 控制按钮框架（必须先定义）
         self.control_frame = ttk.Frame(main_frame)
@@ -121,6 +224,10 @@ class TypingTutor:
         self.start_time = time.time()
         self.correct_chars = 0
         self.total_chars = 0
+        # 增量检查的状态：最早被修改的位置、每个字符是否正确、当前高亮的按键
+        self.edit_start = None
+        self.char_results = []
+        self.set_key_highlight(None)
         self.update_stats()
 
         # 智能调整：根据表现调整难度
@@ -151,42 +258,101 @@ class TypingTutor:
                 btn.pack(side="left", padx=1, pady=1)
                 self.key_buttons[key] = btn
 
-    def check_typing(self, event):
-        """实时检查输入内容"""
-        user_input = self.input_text.get(1.0, tk.END).strip()
-        self.total_chars = len(user_input)
-
-        # 重置所有键盘按钮样式
-        for btn in self.key_buttons.values():
-            btn.config(background="SystemButtonFace")
+    def track_edits(self):
+        """拦截文本框的 insert/delete/replace 命令，记录最早被修改的字符位置
+
+        Tk 的标签跟随字符移动，插入/删除后单凭新旧文本的公共前缀无法确定真正的修改位置，
+        所以直接在修改发生时记录下来，检查时只需读取这之后的内容。
+        """
+        widget = self.input_text
+        original = widget._w + "_orig"
+        widget.tk.call("rename", widget._w, original)
+        self.edit_start = None
+
+        def dispatch(operation, *args):
+            try:
+                if operation in ("insert", "delete", "replace") and args:
+                    index = widget.tk.call(original, "index", args[0])
+                    # 插入到 end 时 Tk 实际插在最后的换行符之前
+                    if widget.tk.getboolean(widget.tk.call(original, "compare", index, ">", "end-1c")):
+                        index = widget.tk.call(original, "index", "end-1c")
+                    offset = int(widget.tk.call(original, "count", "-chars", "1.0", index) or 0)
+                    if self.edit_start is None or offset < self.edit_start:
+                        self.edit_start = offset
+                return widget.tk.call((original, operation) + args)
+            except tk.TclError:
+                return ""
+
+        widget.tk.createcommand(widget._w, dispatch)
 
-        # 高亮当前需要按的键
-        if user_input and len(user_input) < len(self.target_sentence):
-            next_char = self.target_sentence[len(user_input)].upper()
-            if next_char in self.key_buttons:
-                self.key_buttons[next_char].config(background="yellow")
-
-        # 实时高亮显示正确/错误
-        self.input_text.tag_remove("correct", "1.0", "end")
-        self.input_text.tag_remove("wrong", "1.0", "end")
-
-        self.correct_chars = 0
-        for i, (input_char, target_char) in enumerate(zip(user_input, self.target_sentence)):
-            if input_char == target_char:
+    def check_typing(self, event):
+        """实时检查输入内容（增量）：只读取并重新比对修改位置之后的内容，只更新变化的标签和按键"""
+        started = self.latency_probe.start(event)
+        start = self.edit_start
+        if start is None:
+            return  # 没有修改文本的按键（如 Shift）
+        self.edit_start = None
+
+        changed = self.input_text.get(f"1.0+{start}c", "end-1c")
+        length = start + len(changed)
+
+        # 撤销修改位置之后的统计和标签，之前的字符没有移动，标签保持不变
+        for result in self.char_results[start:]:
+            if result:
+                self.correct_chars -= 1
+        del self.char_results[start:]
+        self.input_text.tag_remove("correct", f"1.0+{start}c", "end")
+        self.input_text.tag_remove("wrong", f"1.0+{start}c", "end")
+
+        # 只比对修改位置之后的内容，连续相同结果合并为一次 tag_add
+        run_start = start
+        for i in range(start, min(length, len(self.target_sentence))):
+            result = changed[i - start] == self.target_sentence[i]
+            self.char_results.append(result)
+            if result:
                 self.correct_chars += 1
-                self.input_text.tag_add("correct", f"1.{i}")
-                if i == len(user_input) - 1:  # 只在最新输入时播放音效
-                    self.correct_sound()
+            if i > run_start and result != self.char_results[i - 1]:
+                self.tag_run(run_start, i)
+                run_start = i
+        if run_start < len(self.char_results):
+            self.tag_run(run_start, len(self.char_results))
+
+        grew = length > self.total_chars
+        self.total_chars = length
+
+        # 高亮当前需要按的键，只改动前后两个按键
+        next_key = None
+        if 0 < length < len(self.target_sentence):
+            next_key = self.target_sentence[length].upper()
+        self.set_key_highlight(next_key)
+
+        # 只在输入新字符时播放音效
+        if grew and len(self.char_results) == length:
+            if self.char_results[-1]:
+                self.correct_sound()
             else:
-                self.input_text.tag_add("wrong", f"1.{i}")
-                if i == len(user_input) - 1:  # 只在最新输入时播放音效
-                    self.wrong_sound()
-
-        # 设置标签样式
-        self.input_text.tag_config("correct", background="lightgreen")
-        self.input_text.tag_config("wrong", background="salmon")
+                self.wrong_sound()
 
         self.update_stats()
+        self.latency_probe.stop(started)
+
+    def tag_run(self, start, end):
+        """给 [start, end) 区间内结果相同的字符加上标签"""
+        tag = "correct" if self.char_results[start] else "wrong"
+        self.input_text.tag_add(tag, f"1.0+{start}c", f"1.0+{end}c")
+
+    def set_key_highlight(self, key):
+        """切换虚拟键盘上的高亮按键，只恢复上一个高亮键"""
+        previous = getattr(self, 'highlighted_key', None)
+        if key not in self.key_buttons:
+            key = None
+        if key == previous:
+            return
+        if previous is not None:
+            self.key_buttons[previous].config(background="")  # 恢复样式默认背景，跨平台可用
+        if key is not None:
+            self.key_buttons[key].config(background="yellow")
+        self.highlighted_key = key
 
     def update_stats(self):
         """更新统计信息"""
@@ -200,8 +366,17 @@ class TypingTutor:
             stats_text += " (建议降低速度提高准确性)"
         elif accuracy > 95 and cpm > 200:
             stats_text += " (优秀！)"
+        if self.latency_text:
+            stats_text += f" | {self.latency_text}"
         self.stats_label.config(text=stats_text)
 
+    def refresh_latency(self, interval=500):
+        """定时刷新延迟统计"""
+        if self.latency_probe.samples:
+            self.latency_text = self.latency_probe.report()
+            self.update_stats()
+        self.root.after(interval, self.refresh_latency)
+
     def make_harder(self, sentence):
         """智能增强难度"""
         # 示例增强方法：增加标点/数字/大写
@@ -219,7 +394,43 @@ class TypingTutor:
         return ' '.join(sentence.split()[:5]).replace(",", "").replace("!", "")
 
 
-if __name__ == "__main__":
+def benchmark(lengths=(50, 500, 5000, 50000), sample=50):
+    """用合成按键驱动 check_typing，统计不同文本长度下每次按键的平均耗时
+
+    增量检查时每键耗时应基本不随文本长度增长。运行：python 键盘练习.py --bench
+    """
     root = tk.Tk()
+    root.withdraw()
     app = TypingTutor(root)
-    root.mainloop()
\ No newline at end of file
+    app.correct_sound = app.wrong_sound = lambda: None  # 测试时关闭音效
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+
+    print(f"{'长度':>8} | {'每键耗时(ms)':>12}")
+    for length in lengths:
+        app.new_exercise()
+        app.target_sentence = ''.join(random.choice(alphabet) for _ in range(length))
+        # 约 10% 的字符故意打错，覆盖正确/错误标签交替的情况
+        typed = [c if random.random() > 0.1 else '#' for c in app.target_sentence]
+
+        # 先打到接近末尾，只计量最后 sample 次按键
+        for char in typed[:-sample]:
+            app.input_text.insert(tk.END + "-1c", char)
+            app.check_typing(None)
+        start = time.perf_counter()
+        for char in typed[-sample:]:
+            app.input_text.insert(tk.END + "-1c", char)
+            app.check_typing(None)
+        per_key = (time.perf_counter() - start) / sample * 1000
+        print(f"{length:>8} | {per_key:>12.3f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    import sys
+    if "--bench" in sys.argv:
+        benchmark()
+    else:
+        root = tk.Tk()
+        app = TypingTutor(root)
+        root.mainloop()
+        print(app.latency_probe.report())
\ No newline at end of file